@@ -0,0 +1,211 @@
+"""
+Picks CHUNK_SIZE and NUM_WORKERS for main.py from short calibration runs on a sample.
+
+Every stage is timed for a few (rows, workers) pairs and fitted to
+    t = a + b * rows / workers + c * workers + d * rows
+i.e. fixed start-up cost, parallel work, per-worker pool overhead and serial work.
+The models are then evaluated for every candidate configuration that fits the
+available cores and memory, and the fastest one is saved per host.
+"""
+
+import os
+import json
+import time
+import socket
+import numpy as np
+import pandas as pd
+import psutil
+from scipy.optimize import nnls
+
+from config import AUTOTUNE_PROFILE_PATH, AUTOTUNE_SAMPLE_ROWS, AUTOTUNE_CHUNK_SIZES, AUTOTUNE_MEMORY_FACTOR
+from task_A import LocationAnomalyDetector
+from task_B import SpeedCourseAnomalyDetector
+from task_C import NeighboringVesselAnomalyDetector
+from task_D import DuplicatePositionDetector
+from ingest_filter import IngestClassifier
+
+STAGES = ["task_a", "task_b", "task_c", "task_d"]
+
+def available_cores():
+    # Respects taskset / SLURM --cpus-per-task where the platform exposes affinity
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def available_memory():
+    """Available bytes, capped by the cgroup limit SLURM jobs run under."""
+    available = psutil.virtual_memory().available
+    for path in ["/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"]:
+        try:
+            with open(path) as f:
+                limit = f.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit():
+            used = psutil.Process().memory_info().rss
+            available = min(available, int(limit) - used)
+    return max(available, 0)
+
+def worker_candidates(cores):
+    # Tasks A and B run their pools at the same time, so each gets at most half the cores
+    max_workers = max(1, cores // 2)
+    candidates = {1, max_workers}
+    w = 2
+    while w <= max_workers:
+        candidates.add(w)
+        w *= 2
+    return sorted(candidates)
+
+def _features(rows, workers):
+    return [1.0, rows / workers, workers, rows]
+
+def time_stages(df, num_workers, invalid_positions=None):
+    """
+    Runs every stage once the way main.run_chunk_local does and returns seconds per stage.
+    df holds the plausible rows only; invalid_positions, the sentinel rows split off at
+    ingest, replace Task A's invalid jumps before Task C.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    jump_anomalies, invalid_jumps = LocationAnomalyDetector(df, num_workers=num_workers).detect_location_anomalies_parallel()
+    timings["task_a"] = time.perf_counter() - start
+    if invalid_positions is not None:
+        invalid_jumps = invalid_positions
+
+    start = time.perf_counter()
+    speed_anomalies, course_anomalies = SpeedCourseAnomalyDetector(df, num_workers=num_workers).detect_anomalies_parallel()
+    timings["task_b"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    DuplicatePositionDetector(df).detect_duplicate_positions()
+    timings["task_d"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    NeighboringVesselAnomalyDetector(
+        df, jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, num_workers=num_workers
+    ).detect_inconsistencies_parallel()
+    timings["task_c"] = time.perf_counter() - start
+
+    return timings
+
+def calibrate(df, sample_rows=AUTOTUNE_SAMPLE_ROWS, cores=None):
+    """Times every stage on the plausible rows of 1/4, 1/2 and all of a sample for a spread of worker counts."""
+    cores = cores or available_cores()
+    sample_rows = min(sample_rows, len(df))
+    candidates = worker_candidates(cores)
+    # Smallest, middle and largest worker counts are enough to fit the model
+    calibration_workers = sorted({candidates[0], candidates[len(candidates) // 2], candidates[-1]})
+
+    measurements = []
+    for rows in [sample_rows // 4, sample_rows // 2, sample_rows]:
+        sample = df.iloc[:rows]
+        # main.py classifies at ingest, so the detectors only ever see plausible rows
+        labels = IngestClassifier(sample).classify()
+        plausible = sample[labels == "plausible"].copy()
+        invalid_positions = sample[labels == "sentinel"]
+        for workers in calibration_workers:
+            print(f"[Autotune] Calibrating {rows:,} rows with {workers} workers...")
+            timings = time_stages(plausible, workers, invalid_positions)
+            measurements.append({"rows": rows, "workers": workers, **timings})
+    return pd.DataFrame(measurements)
+
+def fit_stage_models(measurements):
+    """
+    Non-negative least-squares fit of the cost model per stage. With a single
+    calibrated worker count the worker terms cannot be told apart from the others,
+    so only the fixed and serial terms are fitted and the worker terms stay zero.
+    """
+    X = np.array([_features(r, w) for r, w in zip(measurements["rows"], measurements["workers"])])
+    fitted_terms = [0, 1, 2, 3] if measurements["workers"].nunique() > 1 else [0, 3]
+    models = {}
+    for stage in STAGES:
+        coefficients = np.zeros(X.shape[1])
+        coefficients[fitted_terms], _ = nnls(X[:, fitted_terms], measurements[stage].to_numpy())
+        models[stage] = coefficients.tolist()
+    return models
+
+def predict_stage(models, stage, rows, workers):
+    return float(np.dot(models[stage], _features(rows, workers)))
+
+def predict_total_time(models, total_rows, chunk_size, workers):
+    """A, B and D run side by side per chunk, C runs after them."""
+    full_chunks, remainder = divmod(total_rows, chunk_size)
+    chunk_sizes = [chunk_size] * full_chunks + ([remainder] if remainder else [])
+
+    total = 0.0
+    for rows in chunk_sizes:
+        concurrent = max(predict_stage(models, s, rows, workers) for s in ["task_a", "task_b", "task_d"])
+        total += concurrent + predict_stage(models, "task_c", rows, workers)
+    return total
+
+def choose_config(models, total_rows, bytes_per_row, cores, memory):
+    best = None
+    chunk_sizes = sorted({min(c, total_rows) for c in AUTOTUNE_CHUNK_SIZES})
+
+    for chunk_size in chunk_sizes:
+        # The full dataset stays resident in main.py next to the working copies of a chunk
+        peak_memory = bytes_per_row * (total_rows + chunk_size * AUTOTUNE_MEMORY_FACTOR)
+        if peak_memory > memory:
+            continue
+        for workers in worker_candidates(cores):
+            predicted = predict_total_time(models, total_rows, chunk_size, workers)
+            if best is None or predicted < best["predicted_time"]:
+                best = {"chunk_size": chunk_size, "num_workers": workers, "predicted_time": round(predicted, 2)}
+
+    if best is None:
+        # Nothing fits the memory estimate, fall back to the smallest chunks
+        smallest = chunk_sizes[0]
+        best = {"chunk_size": smallest, "num_workers": 1,
+                "predicted_time": round(predict_total_time(models, total_rows, smallest, 1), 2)}
+    return best
+
+def load_profile(total_rows, path=AUTOTUNE_PROFILE_PATH):
+    """Returns the saved profile for this host if it was tuned on a similar amount of data."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        profiles = json.load(f)
+
+    profile = profiles.get(socket.gethostname())
+    if profile is None or profile["cores"] != available_cores():
+        return None
+    if not 0.5 <= total_rows / profile["total_rows"] <= 2:
+        return None
+    return profile
+
+def save_profile(profile, path=AUTOTUNE_PROFILE_PATH):
+    profiles = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            profiles = json.load(f)
+    profiles[socket.gethostname()] = profile
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profiles, f, indent=2)
+
+def autotune(df, sample_rows=AUTOTUNE_SAMPLE_ROWS):
+    """Calibrates on df, picks a configuration and saves it for this host."""
+    cores = available_cores()
+    memory = available_memory()
+    bytes_per_row = df.memory_usage(deep=True).sum() / max(len(df), 1)
+
+    measurements = calibrate(df, sample_rows, cores)
+    models = fit_stage_models(measurements)
+    best = choose_config(models, len(df), bytes_per_row, cores, memory)
+
+    profile = {
+        **best,
+        "cores": cores,
+        "memory_gb": round(memory / 1e9, 2),
+        "total_rows": len(df),
+        "models": models,
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    save_profile(profile)
+
+    print(f"[Autotune] {cores} cores, {memory / 1e9:.1f} GB available -> "
+          f"CHUNK_SIZE={best['chunk_size']:,}, NUM_WORKERS={best['num_workers']} "
+          f"(predicted {best['predicted_time']} s)")
+    return profile
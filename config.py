@@ -1,2 +1,45 @@
 FILE_PATH = "aisdk-2024-07-06.csv"
-GRID_SIZE = 0.4
\ No newline at end of file
+GRID_SIZE = 0.4
+TIMESTAMP_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+# Cross-vessel duplicate positions (Task D)
+DUPLICATE_POSITION_PRECISION = 0.0001  # degrees, roughly 11 m in latitude
+DUPLICATE_TIME_WINDOW = 10  # seconds
+DUPLICATE_MIN_VESSELS = 2
+
+
+# Local detection service
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_MAX_VESSELS = 100_000  # LRU bound on per-MMSI state
+
+
+# Auto-tuning of CHUNK_SIZE / NUM_WORKERS
+AUTOTUNE_PROFILE_PATH = "results/autotune_profile.json"
+AUTOTUNE_SAMPLE_ROWS = 200_000
+AUTOTUNE_CHUNK_SIZES = [250_000, 500_000, 1_000_000, 1_500_000, 2_000_000]
+AUTOTUNE_MEMORY_FACTOR = 6  # peak memory per chunk, in multiples of the chunk itself
+
+
+# Time-normalised jump detection (Task A)
+JUMP_SPEED_CEILINGS = {  # knots, by MMSI class
+    "vessel": 60,
+    "craft_associated": 60,
+    "sart": 15,
+    "sar_aircraft": 600,
+    "base_station": 1,
+    "aid_to_navigation": 5,
+    "other": 60,
+}
+JUMP_MAX_REPORTING_GAP = 3600  # seconds; longer gaps are only checked against the speed ceiling
+JUMP_MIN_HOP_KM = 0.1  # smaller steps are treated as GPS noise
+JUMP_BASELINE_WINDOW = 20  # fixes in the rolling median speed baseline
+JUMP_BASELINE_FACTOR = 5  # flag steps this many times faster than the vessel's baseline
+
+
+# Per-vessel track summary
+VESSEL_SUMMARY_PATH = "results/vessel_summary.sqlite"
+
+
+# Dask backend
+DASK_PARTITIONS_PER_WORKER = 2
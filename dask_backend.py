@@ -0,0 +1,103 @@
+"""
+Optional dask backend for main.py. The chunk is hash-partitioned by MMSI for
+Tasks A and B and by grid cell for Task C, so every partition can be checked
+independently. Task D matches fixes across neighbouring position buckets, so it
+runs as one task on the whole chunk. The tasks run on a LocalCluster or on a
+multi-node cluster reached through a scheduler address.
+Results are ordered exactly like the single-node path.
+"""
+
+import os
+import pandas as pd
+from config import GRID_SIZE, DASK_PARTITIONS_PER_WORKER
+from task_A import LocationAnomalyDetector
+from task_B import SpeedCourseAnomalyDetector
+from task_C import NeighboringVesselAnomalyDetector
+from task_D import DuplicatePositionDetector
+
+# Shipped to remote workers, which may not have the repository on their path
+PIPELINE_MODULES = ["config.py", "timer_wraper.py", "ingest_filter.py", "task_A.py", "task_B.py", "task_C.py", "task_D.py", "dask_backend.py"]
+
+def get_client(scheduler_address=None, n_workers=None):
+    try:
+        from dask.distributed import Client, LocalCluster
+    except ImportError as e:
+        raise ImportError("The dask backend needs dask.distributed: pip install 'dask[distributed]'") from e
+
+    if scheduler_address is None:
+        # One single-threaded process per worker, like the multiprocessing pools
+        client = Client(LocalCluster(n_workers=n_workers, threads_per_worker=1, processes=True))
+    else:
+        client = Client(scheduler_address)
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for module in PIPELINE_MODULES:
+            client.upload_file(os.path.join(base_dir, module))
+
+    print(f" Dask backend: {len(client.nthreads())} workers, dashboard at {client.dashboard_link}")
+    return client
+
+def hash_partition(df, keys, n_partitions):
+    """Splits df into at most n_partitions frames so equal keys share a partition; row order is kept."""
+    partition_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions
+    return [part for _, part in df.groupby(partition_ids, sort=True)]
+
+def _combine(frames, sort_by):
+    """Concatenates partition results and restores the single-node ordering with a stable sort."""
+    non_empty = [df for df in frames if not df.empty]
+    if not non_empty:
+        # Keep the columns of an empty result, the single-node path writes them as a CSV header
+        with_columns = [df for df in frames if len(df.columns)]
+        return with_columns[0].reset_index(drop=True) if with_columns else pd.DataFrame()
+    return pd.concat(non_empty).sort_values(sort_by, kind="stable").reset_index(drop=True)
+
+def _run_vessel_partition(df):
+    jump_anomalies, invalid_jumps = LocationAnomalyDetector(df, num_workers=1).detect_location_anomalies_sequential()
+    speed_anomalies, course_anomalies = SpeedCourseAnomalyDetector(df, num_workers=1).detect_anomalies_sequential()
+    return jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies
+
+def _run_duplicate_positions(df):
+    return DuplicatePositionDetector(df).detect_duplicate_positions()
+
+def _run_grid_partition(df, anomaly_mmsi):
+    # Task C only uses the MMSI sets of the anomaly frames
+    detector_c = NeighboringVesselAnomalyDetector(df, anomaly_mmsi, None, None, None, num_workers=1)
+    return detector_c.detect_inconsistencies_sequential()
+
+def run_chunk_dask(client, df_chunk, df_vessels, invalid_jumps):
+    """Runs Tasks A-D on one chunk and returns the same frames as main.run_chunk_local."""
+    n_partitions = max(1, sum(client.nthreads().values()) * DASK_PARTITIONS_PER_WORKER)
+    vessel_parts = hash_partition(df_vessels, df_vessels["MMSI"], n_partitions)
+
+    # Tasks A, B and D are independent, so they are all submitted together
+    vessel_futures = client.map(_run_vessel_partition, client.scatter(vessel_parts)) if vessel_parts else []
+    [chunk_future] = client.scatter([df_chunk])
+    duplicates_future = client.submit(_run_duplicate_positions, chunk_future)
+
+    vessel_results = client.gather(vessel_futures)
+    if vessel_results:
+        # Task A only sees plausible rows; its invalid jumps are the sentinel rows passed in
+        jump_parts, _, speed_parts, course_parts = zip(*vessel_results)
+        jump_anomalies = _combine(jump_parts, "MMSI")
+        speed_anomalies = _combine(speed_parts, "MMSI")
+        course_anomalies = _combine(course_parts, "MMSI")
+    else:
+        # No vessels to check; empty frames that still carry the columns, as in main.run_chunk_local
+        jump_anomalies, _ = LocationAnomalyDetector(df_vessels).detect_anomalies_for_frame(df_vessels)
+        speed_anomalies, course_anomalies = SpeedCourseAnomalyDetector(df_vessels).detect_anomalies_for_frame(df_vessels)
+
+    anomaly_mmsi = pd.DataFrame({"MMSI": pd.concat([
+        df["MMSI"] for df in [jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies] if not df.empty
+    ] or [pd.Series(dtype="int64")]).unique()})
+
+    grid_keys = pd.DataFrame({
+        "x": (df_chunk["Longitude"] // GRID_SIZE).astype(int),
+        "y": (df_chunk["Latitude"] // GRID_SIZE).astype(int),
+    })
+    grid_parts = hash_partition(df_chunk, grid_keys, n_partitions)
+    [anomaly_mmsi_future] = client.scatter([anomaly_mmsi], broadcast=True)
+    grid_futures = client.map(_run_grid_partition, client.scatter(grid_parts), anomaly_mmsi=anomaly_mmsi_future)
+
+    duplicate_positions = duplicates_future.result()
+    inconsistencies = _combine(client.gather(grid_futures), ["Grid_X", "Grid_Y"])
+
+    return jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, duplicate_positions, inconsistencies
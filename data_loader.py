@@ -1,9 +1,29 @@
+import os
+import mmap
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+from concurrent.futures import ThreadPoolExecutor
 from config import FILE_PATH
+from autotune import available_cores
 import timer_wraper as tw
 import dask.dataframe as dd
 from dask.diagnostics import ProgressBar
 
+USECOLS = ["# Timestamp", "MMSI", "Latitude", "Longitude", "ROT", "SOG", "COG"]
+
+# Arrow types for the columns the pipeline actually uses
+ARROW_TYPES = {
+    "# Timestamp": pa.string(),
+    "MMSI": pa.int64(),
+    "Latitude": pa.float64(),
+    "Longitude": pa.float64(),
+    "ROT": pa.float64(),
+    "SOG": pa.float64(),
+    "COG": pa.float64(),
+}
+
 
 
 class DataLoader:
@@ -44,12 +64,104 @@ class DataLoader:
             "D": "float64",  
             }
         with ProgressBar():
-            df = dd.read_csv(self.file_path, blocksize="75MB", dtype=dtypes, assume_missing=True, usecols = ["# Timestamp", "MMSI", "Latitude", "Longitude", "ROT", "SOG", "COG"] )
+            df = dd.read_csv(self.file_path, blocksize="75MB", dtype=dtypes, assume_missing=True, usecols=USECOLS)
             df_cleaned = df.dropna(subset=['Latitude', 'Longitude', '# Timestamp'])
             df_cleaned = df_cleaned.drop_duplicates()
             result = df_cleaned.compute()  
         print(f"Full dataset loaded and cleaned. Total size: {result.memory_usage(deep=True).sum() / 1e6} MB")
         print(result.shape)
         return result
-        
 
+    def _split_byte_ranges(self, mm, start, n_ranges):
+        """Split mm[start:] into n_ranges byte ranges that each end on a newline."""
+        size = len(mm)
+        step = max((size - start) // n_ranges, 1)
+        ranges = []
+        pos = start
+        while pos < size:
+            end = min(pos + step, size)
+            if end < size:
+                newline = mm.find(b"\n", end)
+                end = size if newline == -1 else newline + 1
+            ranges.append((pos, end))
+            pos = end
+        return ranges
+
+    def _parse_range(self, buf, byte_range):
+        """Parse one newline-aligned byte range into typed Arrow columns."""
+        start, end = byte_range
+        read_options = pv.ReadOptions(column_names=self.column_names, use_threads=False)
+        convert_options = pv.ConvertOptions(
+            include_columns=USECOLS,
+            column_types=ARROW_TYPES,
+            strings_can_be_null=True,
+        )
+        return pv.read_csv(
+            pa.BufferReader(buf.slice(start, end - start)),
+            read_options=read_options,
+            convert_options=convert_options,
+        )
+
+    @tw.timeit
+    def load_data_parallel(self, num_threads=None):
+        """
+        Memory-map the raw CSV, split it at newline-aligned byte ranges and parse
+        only USECOLS from every range in parallel with pyarrow.
+        Assumes no quoted field contains a newline, which holds for the aisdk dumps.
+        """
+        num_threads = num_threads or available_cores()
+        file_size = os.path.getsize(self.file_path)
+        start_time = time.perf_counter()
+
+        with open(self.file_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                # Skip the "# Timestamp,..." header, column names come from __init__
+                newline = mm.find(b"\n")
+                header_end = len(mm) if newline == -1 else newline + 1
+                # A few ranges per thread keeps the threads busy when ranges parse unevenly
+                ranges = self._split_byte_ranges(mm, header_end, num_threads * 4)
+                buf = pa.py_buffer(mm)
+                with ThreadPoolExecutor(max_workers=num_threads) as pool:
+                    tables = list(pool.map(lambda r: self._parse_range(buf, r), ranges))
+                del buf
+            finally:
+                mm.close()
+
+        if tables:
+            table = pa.concat_tables(tables)
+        else:
+            # Header-only file: keep the column types of a normal load
+            table = pa.schema([(col, ARROW_TYPES[col]) for col in USECOLS]).empty_table()
+        result = table.to_pandas()
+        result = result.dropna(subset=["Latitude", "Longitude", "# Timestamp"])
+        result = result.drop_duplicates().reset_index(drop=True)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Parsed {file_size / 1e6:.1f} MB in {len(ranges)} byte ranges on {num_threads} threads "
+              f"({file_size / 1e6 / elapsed:.1f} MB/s)")
+        print(f"Full dataset loaded and cleaned. Total size: {result.memory_usage(deep=True).sum() / 1e6} MB")
+        print(result.shape)
+        return result
+
+
+def compare_loaders(file_path=FILE_PATH, num_threads=None):
+    """Report MB/s parse throughput of the dask loader against the byte-range loader."""
+    loader = DataLoader(file_path)
+    file_size = os.path.getsize(file_path)
+    throughput = {}
+
+    for name, load in [("dask", loader.load_data),
+                       ("byte_range", lambda: loader.load_data_parallel(num_threads))]:
+        start = time.perf_counter()
+        df = load()
+        elapsed = time.perf_counter() - start
+        throughput[name] = file_size / 1e6 / elapsed
+        print(f"{name}: {len(df):,} rows in {elapsed:.2f} s ({throughput[name]:.1f} MB/s)")
+
+    print(f"Speedup: {throughput['byte_range'] / throughput['dask']:.2f}x")
+    return throughput
+
+
+if __name__ == "__main__":
+    compare_loaders()
@@ -0,0 +1,94 @@
+"""
+Ingest-time classifier that separates rows the detectors should never see
+(the (91, 0) sentinel, out-of-range and null-island positions and non-vessel
+MMSIs) from plausible vessel fixes, before any grouping happens.
+"""
+
+import numpy as np
+import pandas as pd
+import timer_wraper as tw
+from config import GRID_SIZE
+
+STREAMS = ["plausible", "sentinel", "out_of_range", "null_island", "non_vessel"]
+NON_VESSEL_CLASSES = ["base_station", "sar_aircraft", "aid_to_navigation"]
+
+def classify_mmsi(mmsi):
+    """Maps MMSIs to station classes following the ITU-R M.585 numbering scheme."""
+    mmsi = np.asarray(mmsi)
+    conditions = [
+        (mmsi >= 200_000_000) & (mmsi < 800_000_000),
+        (mmsi >= 111_000_000) & (mmsi < 112_000_000),
+        (mmsi >= 2_000_000) & (mmsi < 8_000_000),  # 00MIDxxxx
+        (mmsi >= 970_000_000) & (mmsi < 975_000_000),
+        (mmsi >= 980_000_000) & (mmsi < 990_000_000),
+        (mmsi >= 990_000_000) & (mmsi < 1_000_000_000),
+    ]
+    classes = ["vessel", "sar_aircraft", "base_station", "sart", "craft_associated", "aid_to_navigation"]
+    return np.select(conditions, classes, default="other")
+
+class IngestClassifier:
+    def __init__(self, df):
+        self.df = df
+
+    @staticmethod
+    def _position_conditions(df):
+        """Sentinel, out-of-range and null-island masks, in the order classify checks them."""
+        lat = df["Latitude"].to_numpy()
+        lon = df["Longitude"].to_numpy()
+        return [
+            (lat == 91.0) & (lon == 0.0),
+            (np.abs(lat) > 90) | (np.abs(lon) > 180),
+            (lat == 0.0) & (lon == 0.0),
+        ]
+
+    @staticmethod
+    def plausible_positions(df):
+        """Boolean mask of rows whose position is usable, whatever the MMSI."""
+        sentinel, out_of_range, null_island = IngestClassifier._position_conditions(df)
+        return ~(sentinel | out_of_range | null_island)
+
+    def classify(self):
+        """Returns the stream of every row; earlier conditions win when several apply."""
+        conditions = self._position_conditions(self.df) + [
+            np.isin(classify_mmsi(self.df["MMSI"].to_numpy()), NON_VESSEL_CLASSES),
+        ]
+        labels = np.select(conditions, STREAMS[1:], default="plausible")
+        return pd.Categorical(labels, categories=STREAMS)
+
+    @tw.timeit
+    def split_streams(self):
+        """
+        Returns (labels, {stream: rows}) for the rejected streams, in the original row order.
+        Plausible rows are not copied; select them from the dataset with labels == "plausible".
+        """
+        labels = self.classify()
+        streams = {stream: self.df[labels == stream] for stream in STREAMS[1:]}
+        return labels, streams
+
+    def report(self, labels):
+        """How much of the rows, vessel groups and grid cells the detectors no longer process."""
+        plausible = np.asarray(labels == "plausible")
+        grid_cells = pd.DataFrame({
+            "x": self.df["Longitude"] // GRID_SIZE,
+            "y": self.df["Latitude"] // GRID_SIZE,
+        })
+
+        total_rows = len(self.df)
+        total_vessels = self.df["MMSI"].nunique()
+        total_cells = len(grid_cells.drop_duplicates())
+        kept_vessels = self.df["MMSI"][plausible].nunique()
+        kept_cells = len(grid_cells[plausible].drop_duplicates())
+
+        report = {f"{stream}_rows": int(count) for stream, count in pd.Series(labels).value_counts().reindex(STREAMS, fill_value=0).items()}
+        report.update({
+            "rows_removed_pct": round(100 * (1 - plausible.sum() / max(total_rows, 1)), 2),
+            "vessel_groups_removed": int(total_vessels - kept_vessels),
+            "grid_cells_removed": int(total_cells - kept_cells),
+        })
+
+        print(" Ingest classification:")
+        for stream in STREAMS:
+            print(f"  - {stream.replace('_', ' ').title()}: {report[f'{stream}_rows']:,} rows")
+        print(f"  - Downstream work removed: {report['rows_removed_pct']}% of rows, "
+              f"{report['vessel_groups_removed']:,} vessel groups, {report['grid_cells_removed']:,} grid cells")
+        return report
@@ -1,5 +1,6 @@
 import os
 import time
+import argparse
 import pandas as pd
 from multiprocessing import Process, Manager
 import timer_wraper as tw
@@ -8,106 +9,181 @@ from data_loader import DataLoader
 from task_A import LocationAnomalyDetector
 from task_B import SpeedCourseAnomalyDetector
 from task_C import NeighboringVesselAnomalyDetector
+from task_D import DuplicatePositionDetector
+from autotune import autotune, load_profile
+from vessel_summary import VesselSummary
+from config import FILE_PATH
+from dask_backend import get_client, run_chunk_dask
+from ingest_filter import IngestClassifier
 
 CHUNK_SIZE = 2_000_000
 NUM_WORKERS = 4
 
-def run_task_a(df, queue):
-    detector_a = LocationAnomalyDetector(df, num_workers=NUM_WORKERS)
+def run_task_a(df, queue, num_workers=NUM_WORKERS):
+    detector_a = LocationAnomalyDetector(df, num_workers=num_workers)
     jump_anomalies, invalid_jumps = detector_a.detect_location_anomalies_parallel()
     queue.put(("task_a", jump_anomalies, invalid_jumps))
 
-def run_task_b(df, queue):
-    detector_b = SpeedCourseAnomalyDetector(df, num_workers=NUM_WORKERS)
+def run_task_b(df, queue, num_workers=NUM_WORKERS):
+    detector_b = SpeedCourseAnomalyDetector(df, num_workers=num_workers)
     speed_anomalies, course_anomalies = detector_b.detect_anomalies_parallel()
     queue.put(("task_b", speed_anomalies, course_anomalies))
 
-def run_task_c(df, jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies):
+def run_task_d(df, queue):
+    detector_d = DuplicatePositionDetector(df)
+    duplicate_positions = detector_d.detect_duplicate_positions()
+    queue.put(("task_d", duplicate_positions, None))
+
+def run_task_c(df, jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, num_workers=NUM_WORKERS):
     detector_c = NeighboringVesselAnomalyDetector(
         df,
         jump_anomalies,
         invalid_jumps,
         speed_anomalies,
         course_anomalies,
-        num_workers=NUM_WORKERS
+        num_workers=num_workers
     )
     inconsistencies = detector_c.detect_inconsistencies_parallel()
     return inconsistencies
 
-def process_chunk(df_chunk, chunk_id, total_counts, all_inconsistencies, all_jump_anomalies, all_invalid_jumps, all_speed_anomalies, all_course_anomalies):
-    print(f"\n🚀 Processing chunk {chunk_id + 1} ({len(df_chunk):,} rows)...")
-
+def run_chunk_local(df_chunk, df_vessels, invalid_jumps, num_workers=NUM_WORKERS):
     with Manager() as manager:
         queue = manager.Queue()
 
-        # Run Task A and B in parallel
-        p1 = Process(target=run_task_a, args=(df_chunk, queue))
-        p2 = Process(target=run_task_b, args=(df_chunk, queue))
+        # Run Task A, B and D in parallel; a hot-only chunk may have no vessels for A and B
+        processes = [Process(target=run_task_d, args=(df_chunk, queue), name="task_d")]
+        if not df_vessels.empty:
+            processes.append(Process(target=run_task_a, args=(df_vessels, queue, num_workers), name="task_a"))
+            processes.append(Process(target=run_task_b, args=(df_vessels, queue, num_workers), name="task_b"))
 
-        p1.start()
-        p2.start()
-        p1.join()
-        p2.join()
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        failed = [p.name for p in processes if p.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{', '.join(failed)} exited with an error")
 
         results = {}
         while not queue.empty():
             task_name, anomalies_1, anomalies_2 = queue.get()
             results[task_name] = (anomalies_1, anomalies_2)
 
-        jump_anomalies, invalid_jumps = results.get("task_a", (pd.DataFrame(), pd.DataFrame()))
-        speed_anomalies, course_anomalies = results.get("task_b", (pd.DataFrame(), pd.DataFrame()))
-
-        # Save per-task results per chunk
-        jump_anomalies.to_csv(f"results/task_a_jump_anomalies_chunk{chunk_id}.csv", index=False)
-        invalid_jumps.to_csv(f"results/task_a_invalid_jumps_chunk{chunk_id}.csv", index=False)
-        speed_anomalies.to_csv(f"results/task_b_speed_anomalies_chunk{chunk_id}.csv", index=False)
-        course_anomalies.to_csv(f"results/task_b_course_anomalies_chunk{chunk_id}.csv", index=False)
-
-        print(" Task A & B complete.")
-        print(f"  - Jump Anomalies: {len(jump_anomalies)}")
-        print(f"  - Invalid Jumps: {len(invalid_jumps)}")
-        print(f"  - Speed Anomalies: {len(speed_anomalies)}")
-        print(f"  - Course Anomalies: {len(course_anomalies)}")
-
-        # Task C
-        print(" Running Task C...")
-        inconsistencies = run_task_c(df_chunk, jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies)
-        print(f"  - Inconsistencies: {len(inconsistencies)}")
-
-        # Save cumulative inconsistencies
-        if not jump_anomalies.empty:
-            all_jump_anomalies.append(jump_anomalies)
-        if not invalid_jumps.empty:
-            all_invalid_jumps.append(invalid_jumps)
-        if not speed_anomalies.empty:
-            all_speed_anomalies.append(speed_anomalies)
-        if not course_anomalies.empty:
-            all_course_anomalies.append(course_anomalies)
-        if not inconsistencies.empty:
-            all_inconsistencies.append(inconsistencies)
-
-        # Update total counts
-        total_counts["jump_anomalies"] += len(jump_anomalies)
-        total_counts["invalid_jumps"] += len(invalid_jumps)
-        total_counts["speed_anomalies"] += len(speed_anomalies)
-        total_counts["course_anomalies"] += len(course_anomalies)
-        total_counts["inconsistencies"] += len(inconsistencies)
+    if df_vessels.empty:
+        # Empty frames that still carry the columns the CSV writers and Task C expect
+        results["task_a"] = LocationAnomalyDetector(df_vessels).detect_anomalies_for_frame(df_vessels)
+        results["task_b"] = SpeedCourseAnomalyDetector(df_vessels).detect_anomalies_for_frame(df_vessels)
+
+    # Task A only sees plausible rows; its invalid jumps are the sentinel rows passed in
+    jump_anomalies, _ = results.get("task_a", (pd.DataFrame(), None))
+    speed_anomalies, course_anomalies = results.get("task_b", (pd.DataFrame(), pd.DataFrame()))
+    duplicate_positions, _ = results.get("task_d", (pd.DataFrame(), None))
+
+    # Task C
+    print(" Running Task C...")
+    inconsistencies = run_task_c(df_chunk, jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, num_workers)
+    return jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, duplicate_positions, inconsistencies
+
+def process_chunk(df_chunk, chunk_id, total_counts, all_inconsistencies, all_jump_anomalies, all_invalid_jumps, all_speed_anomalies, all_course_anomalies, all_duplicate_positions, num_workers=NUM_WORKERS, hot_mmsi=None, client=None, invalid_positions=None):
+    print(f"\n🚀 Processing chunk {chunk_id + 1} ({len(df_chunk):,} rows)...")
+
+    # Tasks A and B only look at one vessel at a time, so clean vessels can be skipped
+    df_vessels = df_chunk if hot_mmsi is None else df_chunk[df_chunk["MMSI"].isin(hot_mmsi)]
+    # Sentinel rows were split off at ingest, they stand in for Task A's invalid jumps
+    invalid_jumps = (invalid_positions if invalid_positions is not None else df_chunk.iloc[:0]).reset_index(drop=True)
+
+    if client is not None:
+        results = run_chunk_dask(client, df_chunk, df_vessels, invalid_jumps)
+    else:
+        results = run_chunk_local(df_chunk, df_vessels, invalid_jumps, num_workers)
+    jump_anomalies, invalid_jumps, speed_anomalies, course_anomalies, duplicate_positions, inconsistencies = results
+
+    # Save per-task results per chunk
+    jump_anomalies.to_csv(f"results/task_a_jump_anomalies_chunk{chunk_id}.csv", index=False)
+    invalid_jumps.to_csv(f"results/task_a_invalid_jumps_chunk{chunk_id}.csv", index=False)
+    speed_anomalies.to_csv(f"results/task_b_speed_anomalies_chunk{chunk_id}.csv", index=False)
+    course_anomalies.to_csv(f"results/task_b_course_anomalies_chunk{chunk_id}.csv", index=False)
+    duplicate_positions.to_csv(f"results/task_d_duplicate_positions_chunk{chunk_id}.csv", index=False)
+
+    print(" Task A, B, C & D complete.")
+    print(f"  - Jump Anomalies: {len(jump_anomalies)}")
+    print(f"  - Invalid Jumps: {len(invalid_jumps)}")
+    print(f"  - Speed Anomalies: {len(speed_anomalies)}")
+    print(f"  - Course Anomalies: {len(course_anomalies)}")
+    print(f"  - Duplicate Positions: {len(duplicate_positions)}")
+    print(f"  - Inconsistencies: {len(inconsistencies)}")
+
+    # Save cumulative inconsistencies
+    if not jump_anomalies.empty:
+        all_jump_anomalies.append(jump_anomalies)
+    if not invalid_jumps.empty:
+        all_invalid_jumps.append(invalid_jumps)
+    if not speed_anomalies.empty:
+        all_speed_anomalies.append(speed_anomalies)
+    if not course_anomalies.empty:
+        all_course_anomalies.append(course_anomalies)
+    if not duplicate_positions.empty:
+        all_duplicate_positions.append(duplicate_positions)
+    if not inconsistencies.empty:
+        all_inconsistencies.append(inconsistencies)
+
+    # Update total counts
+    total_counts["jump_anomalies"] += len(jump_anomalies)
+    total_counts["invalid_jumps"] += len(invalid_jumps)
+    total_counts["speed_anomalies"] += len(speed_anomalies)
+    total_counts["course_anomalies"] += len(course_anomalies)
+    total_counts["duplicate_positions"] += len(duplicate_positions)
+    total_counts["inconsistencies"] += len(inconsistencies)
+
+def resolve_config(df, args):
+    """Explicit flags win, then a fresh or saved autotune profile, then the defaults."""
+    profile = autotune(df) if args.autotune else load_profile(len(df))
+    chunk_size = profile["chunk_size"] if profile else CHUNK_SIZE
+    num_workers = profile["num_workers"] if profile else NUM_WORKERS
+
+    if profile and not args.autotune:
+        print(f" Using saved autotune profile from {profile['tuned_at']}")
+    return args.chunk_size or chunk_size, args.n_workers or num_workers
+
 @tw.timeit
-def main():
+def main(args):
     os.makedirs("results", exist_ok=True)
 
     print(" Loading full dataset...")
-    loader = DataLoader()
-    df = loader.load_data()
+    loader = DataLoader(FILE_PATH)
+    df = loader.load_data_parallel()
     total_rows = len(df)
     print(f" Full dataset loaded: {total_rows:,} rows")
 
-    num_chunks = (total_rows + CHUNK_SIZE - 1) // CHUNK_SIZE
+    # Keep sentinel, out-of-range, null-island and non-vessel rows away from the detectors
+    classifier = IngestClassifier(df)
+    labels, streams = classifier.split_streams()
+    for stream, rows in streams.items():
+        rows.to_csv(f"results/ingest_{stream}.csv", index=False)
+    del streams
+    pd.DataFrame([classifier.report(labels)]).to_csv("results/ingest_report.csv", index=False)
+
+    chunk_size, num_workers = resolve_config(df, args)
+    print(f" CHUNK_SIZE={chunk_size:,}, NUM_WORKERS={num_workers}")
+
+    summary = VesselSummary()
+    hot_mmsi = None
+    if args.hot_only:
+        if summary.is_fresh(FILE_PATH, chunk_size):
+            hot_mmsi = summary.hot_vessels()
+            print(f" Hot-only run: Tasks A & B limited to {len(hot_mmsi):,} vessels with earlier anomalies")
+        else:
+            print(" No vessel summary for this file, chunk size and detector configuration, running on all vessels")
+
+    client = get_client(args.scheduler, num_workers) if args.backend == "dask" else None
+
+    num_chunks = (total_rows + chunk_size - 1) // chunk_size
     total_counts = {
         "jump_anomalies": 0,
         "invalid_jumps": 0,
         "speed_anomalies": 0,
         "course_anomalies": 0,
+        "duplicate_positions": 0,
         "inconsistencies": 0
     }
 
@@ -115,16 +191,21 @@ def main():
     all_invalid_jumps = []
     all_speed_anomalies = []
     all_course_anomalies = []
+    all_duplicate_positions = []
     all_inconsistencies = []
 
     for i in range(num_chunks):
-        start = i * CHUNK_SIZE
-        end = min((i + 1) * CHUNK_SIZE, total_rows)
-        df_chunk = df.iloc[start:end].copy()
+        start = i * chunk_size
+        end = min((i + 1) * chunk_size, total_rows)
+        chunk_labels = labels[start:end]
+        df_chunk = df.iloc[start:end][chunk_labels == "plausible"].copy()
+        invalid_positions = df.iloc[start:end][chunk_labels == "sentinel"]
 
         process_chunk(df_chunk, i, total_counts, all_inconsistencies,
             all_jump_anomalies, all_invalid_jumps,
-            all_speed_anomalies, all_course_anomalies
+            all_speed_anomalies, all_course_anomalies,
+            all_duplicate_positions, num_workers, hot_mmsi, client,
+            invalid_positions
         )
 
     # Save full inconsistencies to one file
@@ -136,9 +217,27 @@ def main():
         pd.concat(all_speed_anomalies).to_csv("results/task_b_all_speed_anomalies.csv", index=False)
     if all_course_anomalies:
         pd.concat(all_course_anomalies).to_csv("results/task_b_all_course_anomalies.csv", index=False)
+    if all_duplicate_positions:
+        pd.concat(all_duplicate_positions).to_csv("results/task_d_all_duplicate_positions.csv", index=False)
     if all_inconsistencies:
         pd.concat(all_inconsistencies).to_csv("results/task_c_all_inconsistencies.csv", index=False)
 
+    if client is not None:
+        client.close()
+
+    # Per-vessel summary; a hot-only run cannot change the counts of a fresh one
+    if hot_mmsi is None:
+        anomalies = {
+            "jump_anomalies": all_jump_anomalies,
+            "invalid_jumps": all_invalid_jumps,
+            "speed_anomalies": all_speed_anomalies,
+            "course_anomalies": all_course_anomalies,
+            "duplicate_positions": all_duplicate_positions,
+            "inconsistencies": all_inconsistencies,
+        }
+        anomalies = {name: pd.concat(dfs) if dfs else None for name, dfs in anomalies.items()}
+        summary.save(summary.build(df, anomalies), FILE_PATH, chunk_size)
+
     # Save summary
     summary_path = "results/anomaly_summary_total.csv"
     pd.DataFrame([total_counts]).to_csv(summary_path, index=False)
@@ -151,7 +250,18 @@ def main():
     print(f"\n All chunks processed. Summary saved to: {summary_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="GPS spoofing detection pipeline")
+    parser.add_argument("--chunk_size", type=int, help="Override the chunk size")
+    parser.add_argument("--n_workers", type=int, help="Override the number of workers per task")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Calibrate CHUNK_SIZE / NUM_WORKERS on a sample and save the profile for this host")
+    parser.add_argument("--hot_only", action="store_true",
+                        help="Run Tasks A and B only on vessels the cached vessel summary lists as anomalous")
+    parser.add_argument("--backend", choices=["local", "dask"], default="local",
+                        help="local: multiprocessing on this node, dask: partitioned tasks on a dask cluster")
+    parser.add_argument("--scheduler",
+                        help="Dask scheduler address (e.g. tcp://node01:8786); a LocalCluster is started if omitted")
+    main(parser.parse_args())
 
 
 
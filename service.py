@@ -0,0 +1,227 @@
+"""
+Local HTTP detection service. Keeps the detectors and the recent fixes of every
+vessel in memory and runs the Task A/B/C/D logic on each posted batch of AIS fixes.
+
+    POST /detect   JSON array of fixes, or an Arrow IPC stream
+                   (Content-Type: application/vnd.apache.arrow.stream)
+    GET  /health   number of tracked vessels and evictions
+    GET  /vessel/<MMSI>   the vessel's row from the batch-run vessel summary
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from config import (SERVICE_HOST, SERVICE_PORT, SERVICE_MAX_VESSELS, VESSEL_SUMMARY_PATH, TIMESTAMP_FORMAT,
+                    JUMP_BASELINE_WINDOW)
+from data_loader import USECOLS
+from ingest_filter import IngestClassifier, STREAMS
+from task_A import LocationAnomalyDetector
+from task_B import SpeedCourseAnomalyDetector
+from task_C import NeighboringVesselAnomalyDetector
+from task_D import DuplicatePositionDetector
+from vessel_summary import VesselSummary
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+class VesselStateCache:
+    """
+    Recent plausible fixes per MMSI, evicting the least recently seen vessel when full.
+    Each vessel keeps its latest `history` fixes by parsed time, enough to rebuild
+    Task A's rolling baseline and the previous step for the next batch.
+    """
+
+    def __init__(self, max_vessels=SERVICE_MAX_VESSELS, history=JUMP_BASELINE_WINDOW + 1):
+        self.max_vessels = max_vessels
+        self.history = history
+        self.states = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.states)
+
+    def get_many(self, mmsis):
+        rows = [row for mmsi in mmsis for row in self.states.get(mmsi, ())]
+        return pd.DataFrame(rows, columns=USECOLS + ["_time"]).drop(columns="_time")
+
+    def update(self, fixes):
+        """Merges fixes into each vessel's history; fixes carries the parsed time in "_time"."""
+        new_rows = {}
+        for row in fixes[USECOLS + ["_time"]].itertuples(index=False, name=None):
+            new_rows.setdefault(row[USECOLS.index("MMSI")], []).append(row)
+
+        for mmsi, rows in new_rows.items():
+            # Late or out-of-order fixes only displace cached ones that are older
+            merged = sorted(self.states.get(mmsi, []) + rows, key=lambda row: row[-1])
+            self.states[mmsi] = merged[-self.history:]
+            self.states.move_to_end(mmsi)
+
+        while len(self.states) > self.max_vessels:
+            self.states.popitem(last=False)
+            self.evictions += 1
+
+
+class DetectionService:
+    def __init__(self, max_vessels=SERVICE_MAX_VESSELS, summary_path=VESSEL_SUMMARY_PATH):
+        self.cache = VesselStateCache(max_vessels)
+        self.lock = threading.Lock()
+        # Vessels the last batch run found anomalies for, so callers can prioritise them
+        self.summary = VesselSummary(summary_path) if os.path.exists(summary_path) else None
+        self.hot_vessels = self.summary.hot_vessels() if self.summary else set()
+        # Detectors are built once and reused; only their whole-frame methods are called
+        self.detector_a = LocationAnomalyDetector(None, num_workers=1)
+        self.detector_b = SpeedCourseAnomalyDetector(None, num_workers=1)
+
+    def _prepare_batch(self, batch):
+        if batch.empty:
+            batch = pd.DataFrame(columns=USECOLS)
+        for col in USECOLS:
+            if col not in batch.columns:
+                if col in ("# Timestamp", "MMSI", "Latitude", "Longitude"):
+                    raise ValueError(f"Missing required column: {col}")
+                batch[col] = np.nan
+        batch = batch[USECOLS].dropna(subset=["Latitude", "Longitude", "# Timestamp"])
+        batch = batch.astype({"MMSI": "int64", "Latitude": "float64", "Longitude": "float64",
+                              "ROT": "float64", "SOG": "float64", "COG": "float64"})
+        return batch.reset_index(drop=True)
+
+    def _drop_cached_rows(self, *frames):
+        """Drops rows that only came from the cache and were already reported."""
+        return [df[~df["_from_state"]].drop(columns="_from_state").reset_index(drop=True) for df in frames]
+
+    def detect(self, batch):
+        start = time.perf_counter()
+        batch = self._prepare_batch(batch)
+
+        # Same ingest split as main.py: detectors only see plausible vessel fixes and
+        # the sentinel rows stand in for Task A's invalid jumps
+        labels = np.asarray(IngestClassifier(batch).classify())
+        rejected = {stream: int((labels == stream).sum()) for stream in STREAMS[1:]}
+        sentinel_rows = batch[labels == "sentinel"].reset_index(drop=True)
+        batch = batch[labels == "plausible"].reset_index(drop=True)
+
+        with self.lock:
+            # Prepend each vessel's recent fixes so diffs and baselines continue across batches
+            previous = self.cache.get_many(batch["MMSI"].unique())
+            frames = [batch.assign(_from_state=False)]
+            if not previous.empty:
+                frames.insert(0, previous.assign(_from_state=True))
+            combined = pd.concat(frames, ignore_index=True)
+
+            jump_anomalies, _ = self._drop_cached_rows(*self.detector_a.detect_anomalies_for_frame(combined))
+            invalid_jumps = sentinel_rows
+            speed_anomalies, course_anomalies = self._drop_cached_rows(*self.detector_b.detect_anomalies_for_frame(combined))
+
+            # The day-first timestamp strings do not order across months, so keep parsed times
+            seconds = pd.to_datetime(batch["# Timestamp"], format=TIMESTAMP_FORMAT).to_numpy(dtype="datetime64[s]")
+            self.cache.update(batch.assign(_time=seconds.astype(np.int64)))
+            tracked_vessels = len(self.cache)
+            evictions = self.cache.evictions
+
+        duplicate_positions = DuplicatePositionDetector(batch).find_duplicate_positions()
+        detector_c = NeighboringVesselAnomalyDetector(batch, jump_anomalies, invalid_jumps,
+                                                      speed_anomalies, course_anomalies, num_workers=1)
+        inconsistencies = detector_c.find_inconsistencies()
+
+        anomalies = {
+            "jump_anomalies": jump_anomalies,
+            "invalid_jumps": invalid_jumps,
+            "speed_anomalies": speed_anomalies,
+            "course_anomalies": course_anomalies,
+            "duplicate_positions": duplicate_positions,
+            "inconsistencies": inconsistencies,
+        }
+        response = {name: json.loads(df.to_json(orient="records")) for name, df in anomalies.items()}
+        response["known_hot_vessels"] = sorted(int(m) for m in set(batch["MMSI"].unique()) & self.hot_vessels)
+        response["fixes"] = len(batch) + sum(rejected.values())
+        response["rejected_fixes"] = rejected
+        response["tracked_vessels"] = tracked_vessels
+        response["evictions"] = evictions
+        response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return response
+
+
+def make_handler(service):
+    class DetectionRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith("/vessel/"):
+                self._send_vessel_summary(self.path[len("/vessel/"):])
+                return
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {"tracked_vessels": len(service.cache), "evictions": service.cache.evictions})
+
+        def _send_vessel_summary(self, mmsi):
+            if not mmsi.isdigit():
+                self._send_json(400, {"error": "MMSI must be an integer"})
+                return
+            summary = service.summary.lookup([mmsi]) if service.summary else pd.DataFrame()
+            if summary.empty:
+                self._send_json(404, {"error": f"no summary for MMSI {mmsi}"})
+                return
+            self._send_json(200, json.loads(summary.reset_index().to_json(orient="records"))[0])
+
+        def do_POST(self):
+            if self.path != "/detect":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.headers.get("Content-Type", "").startswith(ARROW_CONTENT_TYPE):
+                    batch = pa.ipc.open_stream(body).read_all().to_pandas()
+                else:
+                    payload = json.loads(body)
+                    batch = pd.DataFrame(payload.get("fixes", []) if isinstance(payload, dict) else payload)
+                response = service.detect(batch)
+            except (ValueError, KeyError, TypeError, pa.ArrowInvalid) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self._send_json(200, response)
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the output under load
+            pass
+
+    return DetectionRequestHandler
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, max_vessels=SERVICE_MAX_VESSELS):
+    service = DetectionService(max_vessels)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Detection service listening on http://{host}:{port} (max {max_vessels:,} vessels)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local AIS anomaly detection service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--max_vessels", type=int, default=SERVICE_MAX_VESSELS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_vessels)
@@ -0,0 +1,89 @@
+"""
+Load generator for service.py. Replays the first rows of the AIS file as batches
+from several concurrent clients and reports throughput and request latency.
+Start the service first: python service.py
+"""
+
+import os
+import time
+import json
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from config import FILE_PATH, SERVICE_HOST, SERVICE_PORT
+from data_loader import USECOLS
+from service import ARROW_CONTENT_TYPE
+
+def encode_batch(batch, use_arrow):
+    if use_arrow:
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_CONTENT_TYPE
+    return batch.to_json(orient="records").encode(), "application/json"
+
+def post_batch(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        json.loads(response.read())
+    return time.perf_counter() - start
+
+def run_benchmark(url, df, batch_size, concurrency, use_arrow):
+    # Encode up front so the client side does not skew the service timings
+    payloads = [encode_batch(df.iloc[i:i + batch_size], use_arrow) for i in range(0, len(df), batch_size)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda p: post_batch(url, *p), payloads))
+    total_time = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "fixes_per_s": round(len(df) / total_time, 1),
+        "requests_per_s": round(len(payloads) / total_time, 2),
+        "p50_ms": round(np.percentile(latencies_ms, 50), 2),
+        "p95_ms": round(np.percentile(latencies_ms, 95), 2),
+        "p99_ms": round(np.percentile(latencies_ms, 99), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local detection service")
+    parser.add_argument("--url", default=f"http://{SERVICE_HOST}:{SERVICE_PORT}/detect")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[500, 2_000, 10_000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--arrow", action="store_true", help="Send Arrow IPC instead of JSON")
+    args = parser.parse_args()
+
+    # Replay in file order so each vessel's fixes arrive chronologically
+    df = pd.read_csv(FILE_PATH, usecols=USECOLS, nrows=args.rows)
+    df = df.dropna(subset=["Latitude", "Longitude", "# Timestamp"])
+    print(f"Replaying {len(df):,} fixes against {args.url}")
+
+    log_file = "results/service_benchmark_log.csv"
+    os.makedirs("results", exist_ok=True)
+    is_new_log = not os.path.exists(log_file)
+
+    with open(log_file, "a") as f:
+        if is_new_log:
+            f.write("format,batch_size,concurrency,fixes_per_s,requests_per_s,p50_ms,p95_ms,p99_ms\n")
+
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                stats = run_benchmark(args.url, df, batch_size, concurrency, args.arrow)
+                fmt = "arrow" if args.arrow else "json"
+                print(f"{fmt} batch={batch_size:,} clients={concurrency}: "
+                      f"{stats['fixes_per_s']:,} fixes/s, p50 {stats['p50_ms']} ms, "
+                      f"p95 {stats['p95_ms']} ms, p99 {stats['p99_ms']} ms")
+                f.write(f"{fmt},{batch_size},{concurrency},{stats['fixes_per_s']},{stats['requests_per_s']},"
+                        f"{stats['p50_ms']},{stats['p95_ms']},{stats['p99_ms']}\n")
+
+if __name__ == "__main__":
+    main()
@@ -2,65 +2,121 @@
 Program to detect location anomalities described in TASK A
 """
 
+import numpy as np
 import pandas as pd
 import multiprocessing as mp
 import timer_wraper as tw
+from ingest_filter import IngestClassifier, classify_mmsi
+from config import (TIMESTAMP_FORMAT, JUMP_SPEED_CEILINGS, JUMP_MAX_REPORTING_GAP, JUMP_MIN_HOP_KM,
+                    JUMP_BASELINE_WINDOW, JUMP_BASELINE_FACTOR)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_NAUTICAL_MILE = 1.852
+JUMP_COLUMNS = ["lat_diff", "lon_diff", "dt_s", "step_km", "implied_speed_kn", "gap", "baseline_speed_kn"]
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
 
 class LocationAnomalyDetector:
     def __init__(self, df, num_workers=4):
         self.df = df
         self.num_workers = num_workers
 
-    def detect_anomalies_for_vessel(self, vessel_data):
-        """Detects unrealistic location jumps and invalid GPS jumps separately for a single vessel."""
-        
-        vessel_data = vessel_data.sort_values("# Timestamp").copy()  # Ensure chronological order
-
-        # Compute differences in latitude and longitude
-        vessel_data["lat_diff"] = vessel_data["Latitude"].diff().abs().round(3)
-        vessel_data["lon_diff"] = vessel_data["Longitude"].diff().abs().round(3)
-
-        # Define a threshold for unrealistic jumps
-        threshold = 0.5  #0.5 degrees jump in lat/lon is suspicious
-        jump_anomalies = vessel_data[(vessel_data["lat_diff"] > threshold) | (vessel_data["lon_diff"] > threshold)]
+    def detect_anomalies_for_frame(self, df):
+        """
+        Detects unrealistic location jumps and invalid GPS jumps for every vessel in df at once.
+
+        Each step is normalised by the time since the vessel's previous plausible fix and
+        flagged when the implied speed exceeds the ceiling for the vessel's MMSI class, or
+        when, inside a dense track, it is JUMP_BASELINE_FACTOR times faster than the
+        vessel's rolling median speed. After a reporting gap only the ceiling applies.
+        """
+        # Sort on parsed times, the day-first timestamp strings do not order across months
+        all_seconds = pd.to_datetime(df["# Timestamp"], format=TIMESTAMP_FORMAT).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        order = np.lexsort((all_seconds, df["MMSI"].to_numpy()))
+        df = df.iloc[order].reset_index(drop=True)
+        all_seconds = all_seconds[order]
 
         # Track jumps to (91.0, 0.0) explicitly
-        invalid_jumps = vessel_data[(vessel_data["Latitude"] == 91.0000) & (vessel_data["Longitude"] == 0.0000)]
+        sentinel = (df["Latitude"] == 91.0000) & (df["Longitude"] == 0.0000)
+        invalid_jumps = df[sentinel].copy()
+
+        # Steps are only measured between plausible positions
+        plausible = IngestClassifier.plausible_positions(df)
+        track = df[plausible].copy()
+        if track.empty:
+            # Nothing to step between; keep the jump columns so empty results stay comparable
+            return track.reindex(columns=list(track.columns) + JUMP_COLUMNS), invalid_jumps
+
+        mmsi = track["MMSI"].to_numpy()
+        lat = track["Latitude"].to_numpy()
+        lon = track["Longitude"].to_numpy()
+        seconds = all_seconds[plausible]
+
+        # The sorted frame keeps every vessel contiguous, so the previous row is the previous fix
+        same_vessel = np.r_[False, mmsi[1:] == mmsi[:-1]]
+        prev_lat = np.r_[np.nan, lat[:-1]]
+        prev_lon = np.r_[np.nan, lon[:-1]]
+        dt = np.r_[np.nan, np.diff(seconds)].astype(float)
+        dt[~same_vessel] = np.nan
+
+        step_km = haversine_km(prev_lat, prev_lon, lat, lon)
+        step_km[~same_vessel] = np.nan
+        # Timestamps have one-second resolution, so a zero dt still spans up to a second
+        implied_speed = step_km / np.maximum(dt, 1) * 3600 / KM_PER_NAUTICAL_MILE
+        gap = dt > JUMP_MAX_REPORTING_GAP
+
+        track["lat_diff"] = np.where(same_vessel, np.abs(lat - prev_lat), np.nan).round(3)
+        track["lon_diff"] = np.where(same_vessel, np.abs(lon - prev_lon), np.nan).round(3)
+        track["dt_s"] = dt
+        track["step_km"] = step_km.round(3)
+        track["implied_speed_kn"] = implied_speed.round(1)
+        track["gap"] = gap
+
+        # Rolling median of the preceding in-track speeds, steps across gaps excluded
+        track_speed = pd.Series(np.where(gap, np.nan, implied_speed), index=track.index)
+        baseline = (track_speed.groupby(mmsi, sort=False)
+                    .rolling(JUMP_BASELINE_WINDOW, min_periods=3).median()
+                    .reset_index(level=0, drop=True)
+                    .reindex(track.index))
+        baseline = baseline.groupby(mmsi, sort=False).shift(1).to_numpy()
+        track["baseline_speed_kn"] = baseline.round(1)
+
+        ceiling = pd.Series(classify_mmsi(mmsi)).map(JUMP_SPEED_CEILINGS).to_numpy(dtype=float)
+        significant = step_km > JUMP_MIN_HOP_KM
+        over_ceiling = implied_speed > ceiling
+        over_baseline = ~gap & (implied_speed > JUMP_BASELINE_FACTOR * baseline)
+
+        jump_anomalies = track[significant & (over_ceiling | over_baseline)]
+        return jump_anomalies, invalid_jumps
 
+    def detect_anomalies_for_vessel(self, vessel_data):
+        """Detects unrealistic location jumps and invalid GPS jumps separately for a single vessel."""
+        jump_anomalies, invalid_jumps = self.detect_anomalies_for_frame(vessel_data)
         return (
             jump_anomalies if not jump_anomalies.empty else None,
             invalid_jumps if not invalid_jumps.empty else None
-            )   
+            )
 
     def _process_batch(self, vessel_batch):
-        """Process a batch of vessels sequentially in one worker."""
-        batch_jump_anomalies = []
-        batch_invalid_jumps = []
+        """Process a batch of vessels in one worker."""
+        return self.detect_anomalies_for_frame(vessel_batch)
 
-        for vessel in vessel_batch:
-            jump, invalid = self.detect_anomalies_for_vessel(vessel)
-            if jump is not None:
-                batch_jump_anomalies.append(jump)
-            if invalid is not None:
-                batch_invalid_jumps.append(invalid)
-
-        return (
-            pd.concat(batch_jump_anomalies) if batch_jump_anomalies else None,
-            pd.concat(batch_invalid_jumps) if batch_invalid_jumps else None
-        )
-    
+    def _split_by_vessel(self, n_batches):
+        """Split the frame into n_batches contiguous MMSI ranges so no vessel spans two batches."""
+        df = self.df.sort_values("MMSI", kind="stable")
+        vessel_groups = np.array_split(df["MMSI"].unique(), n_batches)
+        bounds = [np.searchsorted(df["MMSI"].to_numpy(), group[0]) for group in vessel_groups if len(group)]
+        bounds.append(len(df))
+        return [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
 
     @tw.timeit
     def detect_location_anomalies_parallel(self):
-        grouped = self.df.groupby("MMSI")
-        vessel_list = [group for _, group in grouped]
-
-        # Chunk vessels into batches based on num_workers
-        def chunk_list(lst, n_chunks):
-            avg = len(lst) // n_chunks
-            return [lst[i * avg:(i + 1) * avg] for i in range(n_chunks - 1)] + [lst[(n_chunks - 1) * avg:]]
-
-        vessel_batches = chunk_list(vessel_list, self.num_workers)
+        vessel_batches = self._split_by_vessel(self.num_workers)
+        if not vessel_batches:
+            return self.detect_location_anomalies_sequential()
 
         with mp.Pool(processes=self.num_workers) as pool:
             results = pool.map(self._process_batch, vessel_batches)
@@ -68,24 +124,12 @@ class LocationAnomalyDetector:
         # Unpack and combine
         jump_anomalies_list, invalid_jumps_list = zip(*results)
 
-        jump_anomalies = pd.concat([df for df in jump_anomalies_list if df is not None], ignore_index=True)
-        invalid_jumps = pd.concat([df for df in invalid_jumps_list if df is not None], ignore_index=True)
+        jump_anomalies = pd.concat(jump_anomalies_list, ignore_index=True)
+        invalid_jumps = pd.concat(invalid_jumps_list, ignore_index=True)
 
         return jump_anomalies, invalid_jumps
-    
+
     @tw.timeit
     def detect_location_anomalies_sequential(self):
-        grouped = self.df.groupby("MMSI")
-        jump_anomalies_all = []
-        invalid_jumps_all = []
-
-        for _, vessel_data in grouped:
-            jump, invalid = self.detect_anomalies_for_vessel(vessel_data)
-            if jump is not None:
-                jump_anomalies_all.append(jump)
-            if invalid is not None:
-                invalid_jumps_all.append(invalid)
-
-        jump_anomalies = pd.concat(jump_anomalies_all, ignore_index=True)
-        invalid_jumps = pd.concat(invalid_jumps_all, ignore_index=True)
-        return jump_anomalies, invalid_jumps
\ No newline at end of file
+        jump_anomalies, invalid_jumps = self.detect_anomalies_for_frame(self.df)
+        return jump_anomalies.reset_index(drop=True), invalid_jumps.reset_index(drop=True)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import multiprocessing as mp
 import timer_wraper as tw
@@ -34,6 +35,24 @@ class SpeedCourseAnomalyDetector:
             course_anomalies if not course_anomalies.empty else None
         )
 
+    def detect_anomalies_for_frame(self, df):
+        """Same checks as detect_anomalies_for_vessel, vectorized over every vessel in df at once."""
+        df = df.sort_values(["MMSI", "# Timestamp"], kind="stable").copy()
+        grouped = df.groupby("MMSI", sort=False)
+
+        df["sog_diff"] = grouped["SOG"].diff().abs().round(2)
+        cog_change = grouped["COG"].diff().abs()
+        df["cog_diff"] = np.minimum(cog_change, 360 - cog_change).round(2).fillna(0)
+
+        max_speed_threshold = 50
+        sudden_speed_jump = 5
+        max_rot_threshold = 30
+        max_cog_change = 180
+
+        speed_anomalies = df[(df["SOG"] > max_speed_threshold) | (df["sog_diff"] > sudden_speed_jump)]
+        course_anomalies = df[(df["ROT"].abs() > max_rot_threshold) | (df["cog_diff"] > max_cog_change)]
+        return speed_anomalies, course_anomalies
+
     def _process_batch(self, vessel_batch):
         speed_anomalies_all = []
         course_anomalies_all = []
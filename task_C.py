@@ -61,6 +61,10 @@ class NeighboringVesselAnomalyDetector:
 
     @tw.timeit
     def detect_inconsistencies_sequential(self):
+        return self.find_inconsistencies()
+
+    def find_inconsistencies(self):
+        """Untimed sequential check, for callers that run it per request."""
         self.df['Grid_X'] = (self.df['Longitude'] // self.grid_size).astype(int)
         self.df['Grid_Y'] = (self.df['Latitude'] // self.grid_size).astype(int)
 
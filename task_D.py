@@ -0,0 +1,84 @@
+"""
+Program to detect positions shared by several different vessels at the same time (Task D)
+"""
+
+import numpy as np
+import pandas as pd
+import timer_wraper as tw
+from ingest_filter import IngestClassifier
+from config import DUPLICATE_POSITION_PRECISION, DUPLICATE_TIME_WINDOW, DUPLICATE_MIN_VESSELS, TIMESTAMP_FORMAT
+
+class DuplicatePositionDetector:
+    def __init__(self, df,
+                 precision=DUPLICATE_POSITION_PRECISION,
+                 time_window=DUPLICATE_TIME_WINDOW,
+                 min_vessels=DUPLICATE_MIN_VESSELS):
+        self.df = df
+        self.precision = precision
+        self.time_window = time_window
+        self.min_vessels = min_vessels
+
+    def quantise(self, df):
+        """Returns the (lat, lon, time) bucket of every row as three integer arrays."""
+        timestamps = pd.to_datetime(df["# Timestamp"], format=TIMESTAMP_FORMAT)
+        seconds = timestamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+        lat_key = np.floor(df["Latitude"].to_numpy() / self.precision).astype(np.int64)
+        lon_key = np.floor(df["Longitude"].to_numpy() / self.precision).astype(np.int64)
+        time_key = seconds // self.time_window
+        return lat_key, lon_key, time_key
+
+    @tw.timeit
+    def detect_duplicate_positions(self):
+        return self.find_duplicate_positions()
+
+    def find_duplicate_positions(self):
+        """
+        Finds rows that share a 2x2x2 block of quantised (lat, lon, time) buckets with
+        at least min_vessels distinct MMSIs. Every row is hashed into the eight blocks
+        that contain its bucket, so two fixes in neighbouring buckets always meet in
+        one block, even when they straddle a bucket edge. It is still a single
+        hash-group pass, so the cost grows linearly with the chunk instead of
+        comparing vessel pairs. Each row is reported once, under its busiest block.
+        """
+        # The (91, 0) sentinel, (0, 0) and other impossible positions would all collide
+        df = self.df[IngestClassifier.plausible_positions(self.df)]
+        if df.empty:
+            return pd.DataFrame()
+
+        lat_key, lon_key, time_key = self.quantise(df)
+
+        # A block is named by its lowest bucket, so a row belongs to the blocks one bucket below it
+        offsets = np.array([(d_lat, d_lon, d_time) for d_lat in (0, 1) for d_lon in (0, 1) for d_time in (0, 1)])
+        block_lat = lat_key[None, :] - offsets[:, 0, None]
+        block_lon = lon_key[None, :] - offsets[:, 1, None]
+        block_time = time_key[None, :] - offsets[:, 2, None]
+
+        # Pack each block into one integer so the hash pass groups a single column
+        lat_rel = block_lat - block_lat.min()
+        lon_rel = block_lon - block_lon.min()
+        time_rel = block_time - block_time.min()
+        position_codes, positions = pd.factorize((lat_rel * (lon_rel.max() + 1) + lon_rel).ravel())
+        block_codes, blocks = pd.factorize(position_codes * (time_rel.max() + 1) + time_rel.ravel())
+
+        # Count distinct vessels per block: drop repeated reports of one vessel, then count
+        mmsi_codes, vessels = pd.factorize(df["MMSI"].to_numpy())
+        vessel_blocks = pd.unique(block_codes * len(vessels) + np.tile(mmsi_codes, len(offsets)))
+        vessel_counts = np.bincount(vessel_blocks // len(vessels), minlength=len(blocks))
+
+        # A row can sit in several shared blocks; keep the one with the most vessels
+        row_counts = vessel_counts[block_codes].reshape(len(offsets), len(df))
+        best = row_counts.argmax(axis=0)
+        rows = np.arange(len(df))
+        dup_vessels = row_counts[best, rows]
+        is_duplicate = dup_vessels >= self.min_vessels
+        if not is_duplicate.any():
+            return pd.DataFrame()
+
+        key_cols = ["Lat_Key", "Lon_Key", "Time_Key"]
+        duplicates = df[is_duplicate].copy()
+        for col, block_key in zip(key_cols, (block_lat, block_lon, block_time)):
+            duplicates[col] = block_key[best, rows][is_duplicate]
+        duplicates["Dup_Vessels"] = dup_vessels[is_duplicate].astype(np.int64)
+
+        return duplicates.sort_values(key_cols + ["MMSI", "# Timestamp"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,31 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import JUMP_BASELINE_WINDOW
+from service import DetectionService
+
+def fix(minute, latitude, mmsi=219000001):
+    return {"# Timestamp": f"06/07/2024 00:{minute:02d}:00", "MMSI": mmsi,
+            "Latitude": latitude, "Longitude": 10.0, "SOG": 5.0, "COG": 0.0}
+
+def test_baseline_continues_across_requests(tmp_path):
+    service = DetectionService(summary_path=str(tmp_path / "missing.sqlite"))
+    # ~5 kn, one fix per request, then a ~43 kn hop that only the baseline check catches
+    for minute in range(10):
+        response = service.detect(pd.DataFrame([fix(minute, 55.0 + minute * 0.0015)]))
+        assert response["jump_anomalies"] == []
+    response = service.detect(pd.DataFrame([fix(10, 55.0 + 9 * 0.0015 + 0.012)]))
+    assert len(response["jump_anomalies"]) == 1
+
+def test_state_keeps_latest_fixes(tmp_path):
+    service = DetectionService(summary_path=str(tmp_path / "missing.sqlite"))
+    service.detect(pd.DataFrame([fix(minute, 55.0) for minute in range(30)]))
+    # A late fix older than everything cached does not displace the recent history
+    service.detect(pd.DataFrame([{**fix(0, 55.0), "# Timestamp": "05/07/2024 23:00:00"}]))
+    history = service.cache.get_many([219000001])
+    assert len(history) == JUMP_BASELINE_WINDOW + 1
+    assert history["# Timestamp"].iloc[-1] == "06/07/2024 00:29:00"
+    assert "05/07/2024 23:00:00" not in set(history["# Timestamp"])
@@ -0,0 +1,104 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import JUMP_MAX_REPORTING_GAP, JUMP_SPEED_CEILINGS
+from task_A import LocationAnomalyDetector, JUMP_COLUMNS
+
+def make_frame(latitudes, longitudes):
+    return pd.DataFrame({
+        "# Timestamp": [f"06/07/2024 00:00:{i:02d}" for i in range(len(latitudes))],
+        "MMSI": [219000001] * len(latitudes),
+        "Latitude": latitudes,
+        "Longitude": longitudes,
+    })
+
+def make_track(timestamps, latitudes, mmsi=219000001, longitude=10.0):
+    return pd.DataFrame({
+        "# Timestamp": timestamps,
+        "MMSI": [mmsi] * len(timestamps),
+        "Latitude": latitudes,
+        "Longitude": [longitude] * len(timestamps),
+    })
+
+def steady_track(n_fixes, step_deg, mmsi=219000001, start_lat=55.0):
+    """One fix a minute, moving north by step_deg each time."""
+    timestamps = [f"06/07/2024 00:{i:02d}:00" for i in range(n_fixes)]
+    return make_track(timestamps, [start_lat + i * step_deg for i in range(n_fixes)], mmsi)
+
+def detect(df):
+    return LocationAnomalyDetector(df).detect_anomalies_for_frame(df)
+
+def test_empty_frame():
+    df = make_frame([], [])
+    jump_anomalies, invalid_jumps = LocationAnomalyDetector(df).detect_anomalies_for_frame(df)
+    assert jump_anomalies.empty and invalid_jumps.empty
+    assert all(col in jump_anomalies.columns for col in JUMP_COLUMNS)
+
+def test_only_sentinel_rows():
+    df = make_frame([91.0, 91.0, 91.0], [0.0, 0.0, 0.0])
+    jump_anomalies, invalid_jumps = LocationAnomalyDetector(df).detect_anomalies_for_frame(df)
+    assert jump_anomalies.empty
+    assert len(invalid_jumps) == 3
+
+def test_parallel_on_empty_frame():
+    df = make_frame([], [])
+    jump_anomalies, invalid_jumps = LocationAnomalyDetector(df, num_workers=2).detect_location_anomalies_parallel()
+    assert jump_anomalies.empty and invalid_jumps.empty
+
+def test_slow_step_after_gap_not_flagged():
+    # ~1 kn dense track, then after a long gap a step that is over 5x the baseline
+    df = steady_track(10, 0.0003)
+    gap_fix = make_track(["06/07/2024 02:10:00"], [df["Latitude"].iloc[-1] + 0.2])
+    jump_anomalies, _ = detect(pd.concat([df, gap_fix], ignore_index=True))
+    assert 7200 > JUMP_MAX_REPORTING_GAP
+    assert jump_anomalies.empty
+
+def test_step_over_class_ceiling_flagged():
+    df = make_track(["06/07/2024 00:00:00", "06/07/2024 00:01:00"], [55.0, 55.05])
+    jump_anomalies, _ = detect(df)
+    assert len(jump_anomalies) == 1
+    assert jump_anomalies["implied_speed_kn"].iloc[0] > JUMP_SPEED_CEILINGS["vessel"]
+
+def test_small_hop_caught_by_baseline():
+    # ~5 kn dense track, then a ~43 kn hop that stays under the vessel ceiling
+    df = steady_track(10, 0.0015)
+    hop = make_track(["06/07/2024 00:10:00"], [df["Latitude"].iloc[-1] + 0.012])
+    jump_anomalies, _ = detect(pd.concat([df, hop], ignore_index=True))
+    assert len(jump_anomalies) == 1
+    row = jump_anomalies.iloc[0]
+    assert row["# Timestamp"] == "06/07/2024 00:10:00"
+    assert row["implied_speed_kn"] < JUMP_SPEED_CEILINGS["vessel"]
+    assert row["implied_speed_kn"] > 5 * row["baseline_speed_kn"]
+
+def test_timestamps_ordered_across_month_boundary():
+    # As strings, "01/02" sorts before "31/01", which would turn this into a backwards jump
+    df = make_track(["01/02/2024 00:00:00", "31/01/2024 23:59:00", "01/02/2024 00:01:00"],
+                    [55.001, 55.0, 55.002])
+    jump_anomalies, _ = detect(df)
+    assert jump_anomalies.empty
+
+def test_no_step_across_vessels():
+    # Two steady vessels far apart with interleaved fixes
+    df = pd.concat([steady_track(5, 0.001, mmsi=219000001, start_lat=55.0),
+                    steady_track(5, 0.001, mmsi=219000002, start_lat=60.0)]).sort_values("# Timestamp")
+    jump_anomalies, _ = detect(df)
+    assert jump_anomalies.empty
+
+def test_parallel_matches_sequential():
+    frames = []
+    for i in range(6):
+        track = steady_track(12, 0.0015, mmsi=219000001 + i, start_lat=50.0 + i)
+        track.loc[8, "Latitude"] += 0.05 * (i % 2)  # a ceiling jump on every other vessel
+        track.loc[10, "Latitude"] = 91.0
+        track.loc[10, "Longitude"] = 0.0
+        frames.append(track)
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+    parallel = LocationAnomalyDetector(df, num_workers=3).detect_location_anomalies_parallel()
+    sequential = LocationAnomalyDetector(df, num_workers=3).detect_location_anomalies_sequential()
+    for parallel_frame, sequential_frame in zip(parallel, sequential):
+        assert not sequential_frame.empty
+        pd.testing.assert_frame_equal(parallel_frame.reset_index(drop=True), sequential_frame)
@@ -0,0 +1,46 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DUPLICATE_POSITION_PRECISION
+from task_D import DuplicatePositionDetector
+
+def make_fixes(fixes):
+    """fixes: (MMSI, timestamp, lat, lon) tuples."""
+    return pd.DataFrame(fixes, columns=["MMSI", "# Timestamp", "Latitude", "Longitude"])
+
+def find(df):
+    return DuplicatePositionDetector(df).find_duplicate_positions()
+
+def test_same_bucket_matched():
+    df = make_fixes([(219000001, "06/07/2024 00:00:01", 55.00001, 10.00001),
+                     (219000002, "06/07/2024 00:00:02", 55.00002, 10.00002)])
+    duplicates = find(df)
+    assert sorted(duplicates["MMSI"]) == [219000001, 219000002]
+    assert (duplicates["Dup_Vessels"] == 2).all()
+
+def test_fixes_straddling_bucket_edges_matched():
+    # Either side of a latitude, longitude and time bucket edge at once
+    edge = 55.0 + 500 * DUPLICATE_POSITION_PRECISION
+    df = make_fixes([(219000001, "06/07/2024 00:00:09", edge - 0.000001, 10.0 - 0.000001),
+                     (219000002, "06/07/2024 00:00:10", edge + 0.000001, 10.0 + 0.000001)])
+    duplicates = find(df)
+    assert sorted(duplicates["MMSI"]) == [219000001, 219000002]
+
+def test_each_row_reported_once():
+    df = make_fixes([(219000001, "06/07/2024 00:00:01", 55.00001, 10.00001),
+                     (219000002, "06/07/2024 00:00:01", 55.00001, 10.00001),
+                     (219000003, "06/07/2024 00:00:01", 55.00001, 10.00001),
+                     (219000001, "06/07/2024 00:00:02", 55.00001, 10.00001)])
+    duplicates = find(df)
+    assert len(duplicates) == 4
+    assert (duplicates["Dup_Vessels"] == 3).all()
+
+def test_distant_fixes_and_single_vessel_not_matched():
+    df = make_fixes([(219000001, "06/07/2024 00:00:01", 55.0, 10.0),
+                     (219000001, "06/07/2024 00:00:02", 55.0, 10.0),
+                     (219000002, "06/07/2024 00:00:01", 55.001, 10.0),
+                     (219000003, "06/07/2024 00:01:00", 55.0, 10.0)])
+    assert find(df).empty
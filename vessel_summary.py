@@ -0,0 +1,132 @@
+"""
+Per-vessel track summary: fix count, time span, bounding box, SOG statistics and
+anomaly counts per MMSI, computed in one grouped pass and kept in a small SQLite
+file next to the results so later runs and the service can look vessels up by MMSI.
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import numpy as np
+import pandas as pd
+import timer_wraper as tw
+from ingest_filter import IngestClassifier
+from config import VESSEL_SUMMARY_PATH, TIMESTAMP_FORMAT
+
+TABLE = "vessel_summary"
+META_TABLE = "vessel_summary_meta"
+
+# Thresholds live in config.py and, for Task B, in the detector code itself
+DETECTOR_FILES = ["config.py", "ingest_filter.py", "task_A.py", "task_B.py", "task_C.py", "task_D.py"]
+
+def detector_hash():
+    """Hash of the detector code and configuration the anomaly counts depend on."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in DETECTOR_FILES:
+        with open(os.path.join(base_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+class VesselSummary:
+    def __init__(self, path=VESSEL_SUMMARY_PATH):
+        self.path = path
+
+    @tw.timeit
+    def build(self, df, anomalies):
+        """
+        df: the full dataset, anomalies: {name: anomaly DataFrame with an MMSI column}.
+        Returns one row per MMSI indexed by MMSI.
+        """
+        seconds = pd.to_datetime(df["# Timestamp"], format=TIMESTAMP_FORMAT).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        # Keep the (91, 0) sentinel and other impossible positions out of the bounding box
+        plausible = IngestClassifier.plausible_positions(df)
+
+        frame = pd.DataFrame({
+            "MMSI": df["MMSI"].to_numpy(),
+            "t": seconds,
+            "lat": df["Latitude"].where(plausible).to_numpy(),
+            "lon": df["Longitude"].where(plausible).to_numpy(),
+            "sog": df["SOG"].to_numpy(),
+        })
+        summary = frame.groupby("MMSI").agg(
+            fixes=("t", "size"),
+            first_seen=("t", "min"),
+            last_seen=("t", "max"),
+            lat_min=("lat", "min"),
+            lat_max=("lat", "max"),
+            lon_min=("lon", "min"),
+            lon_max=("lon", "max"),
+            sog_max=("sog", "max"),
+            sog_median=("sog", "median"),
+        )
+        summary["time_span_s"] = summary["last_seen"] - summary["first_seen"]
+
+        count_cols = []
+        for name, anomaly_df in anomalies.items():
+            col = f"{name}_count"
+            if anomaly_df is not None and not anomaly_df.empty:
+                summary[col] = anomaly_df["MMSI"].value_counts().reindex(summary.index, fill_value=0)
+            else:
+                summary[col] = 0
+            count_cols.append(col)
+        summary["total_anomalies"] = summary[count_cols].sum(axis=1)
+        return summary
+
+    def save(self, summary, source_path, chunk_size):
+        """Writes the summary with the source file's size and mtime, the chunk size and the detector hash, so re-runs can tell if it is stale."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        stat = os.stat(source_path)
+        meta = pd.DataFrame({
+            "key": ["source_path", "source_size", "source_mtime", "chunk_size", "detector_hash", "built_at"],
+            "value": [os.path.abspath(source_path), str(stat.st_size), str(stat.st_mtime), str(chunk_size),
+                      detector_hash(), time.strftime("%Y-%m-%d %H:%M:%S")],
+        })
+
+        with sqlite3.connect(self.path) as conn:
+            summary.to_sql(TABLE, conn, if_exists="replace", index=True, index_label="MMSI")
+            meta.to_sql(META_TABLE, conn, if_exists="replace", index=False)
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{TABLE}_mmsi ON {TABLE} (MMSI)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_total ON {TABLE} (total_anomalies)")
+        print(f"Vessel summary for {len(summary):,} vessels saved to: {self.path}")
+
+    def is_fresh(self, source_path, chunk_size):
+        """
+        True if the stored summary was built from source_path as it is on disk now, with the
+        current detectors and the same chunk size (steps across chunk edges are never measured).
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with sqlite3.connect(self.path) as conn:
+                meta = dict(conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall())
+        except sqlite3.Error:
+            return False
+
+        stat = os.stat(source_path)
+        return (meta.get("source_path") == os.path.abspath(source_path)
+                and meta.get("source_size") == str(stat.st_size)
+                and meta.get("source_mtime") == str(stat.st_mtime)
+                and meta.get("chunk_size") == str(chunk_size)
+                and meta.get("detector_hash") == detector_hash())
+
+    def load(self):
+        with sqlite3.connect(self.path) as conn:
+            return pd.read_sql(f"SELECT * FROM {TABLE}", conn, index_col="MMSI")
+
+    def lookup(self, mmsis):
+        """Summary rows for the given MMSIs, read through the MMSI index."""
+        mmsis = [int(m) for m in mmsis]
+        if not mmsis:
+            return pd.DataFrame()
+        placeholders = ",".join("?" * len(mmsis))
+        with sqlite3.connect(self.path) as conn:
+            return pd.read_sql(f"SELECT * FROM {TABLE} WHERE MMSI IN ({placeholders})", conn,
+                               params=mmsis, index_col="MMSI")
+
+    def hot_vessels(self, min_anomalies=1):
+        """MMSIs with at least min_anomalies anomalies of any type."""
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(f"SELECT MMSI FROM {TABLE} WHERE total_anomalies >= ?", (min_anomalies,)).fetchall()
+        return {row[0] for row in rows}